@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, send_from_directory, send_file
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
@@ -6,7 +6,14 @@ import google.generativeai as genai
 import json
 from evaluation.rubric_loader import RubricLoader
 from evaluation.workflow_manager import WorkflowManager
-from colab_executor import ColabWorkflowManager
+from evaluation.evaluation_store import EvaluationStore
+from evaluation.cascade import EvaluationCascade, parse_quick_score
+from evaluation.similarity_index import NearDuplicateIndex, strip_student_specific
+from evaluation.interview_cache import OpeningQuestionCache
+from colab_executor import ColabWorkflowManager, NotebookReportStore
+from request_scheduler import RequestScheduler, SchedulerTimeout, parse_tenant_weights
+from llm_client import LLMClient, LLMDeadlineExceeded, parse_deadlines
+from request_profiler import RequestProfiler
 
 load_dotenv()
 
@@ -15,9 +22,57 @@ CORS(app)
 
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
+profiler = RequestProfiler(
+    output_dir=os.getenv('PROFILE_OUTPUT_DIR', 'profiles'),
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    interval=float(os.getenv('PROFILE_INTERVAL_MS', '5')) / 1000,
+    output_format=os.getenv('PROFILE_FORMAT', 'speedscope'),
+    admin_token=os.getenv('ADMIN_TOKEN')
+)
+profiler.init_app(app)
+
 rubric_loader = RubricLoader()
 workflow_manager = WorkflowManager()
 colab_manager = ColabWorkflowManager()
+report_store = NotebookReportStore(
+    os.getenv('REPORTS_DIR', 'reports'),
+    max_cache_bytes=int(os.getenv('REPORT_CACHE_MAX_MB', '200')) * 1024 * 1024,
+    max_notebooks=int(os.getenv('REPORT_MAX_NOTEBOOKS', '10000'))
+)
+evaluation_store = EvaluationStore(os.getenv('EVALUATION_DB_PATH', 'data/evaluations.db'))
+scheduler = RequestScheduler(
+    max_concurrent=int(os.getenv('SCHEDULER_MAX_CONCURRENT', '8')),
+    tenant_weights=parse_tenant_weights(os.getenv('SCHEDULER_TENANT_WEIGHTS', '')),
+    queue_timeout=float(os.getenv('SCHEDULER_QUEUE_TIMEOUT', '300')),
+    interactive_reserved=int(os.getenv('SCHEDULER_INTERACTIVE_RESERVED', '2'))
+)
+llm_client = LLMClient(
+    deadlines=parse_deadlines(os.getenv('LLM_DEADLINES', '')),
+    max_retries=int(os.getenv('LLM_MAX_RETRIES', '2')),
+    hedging=os.getenv('LLM_HEDGING', 'false').lower() == 'true'
+)
+cascade = EvaluationCascade(workflow_manager)
+
+def generate_opening(prompt, priority_class):
+    with scheduler.slot(priority_class):
+        return llm_client.generate(prompt, endpoint='live_interview').text
+
+opening_cache = OpeningQuestionCache(
+    build_prompt=lambda problem_statement, key_concepts: generate_interview_prompt(
+        problem_statement, key_concepts, 'initial', ''
+    ),
+    generate=generate_opening,
+    pool_size=int(os.getenv('INTERVIEW_OPENING_POOL_SIZE', '3'))
+)
+
+similarity_index = NearDuplicateIndex(max_entries=int(os.getenv('NEAR_DUPLICATE_MAX_ENTRIES', '10000')))
+NEAR_DUPLICATE_REUSE_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_REUSE_THRESHOLD', '0.9'))
+NEAR_DUPLICATE_VERIFY_THRESHOLD = float(os.getenv('NEAR_DUPLICATE_VERIFY_THRESHOLD', '0.7'))
+NEAR_DUPLICATE_SCORE_TOLERANCE = 1.5
+
+def get_tenant(data):
+    """Tenant for fair sharing: the request's cohort/course, else the X-Tenant header"""
+    return data.get('cohort') or request.headers.get('X-Tenant') or 'default'
 
 @app.route('/api/evaluate', methods=['POST'])
 def evaluate_student():
@@ -28,32 +83,80 @@ def evaluate_student():
         problem_statement = data.get('problem_statement', '')
         rubric_name = data.get('rubric_name', 'default')
         workflow_name = data.get('workflow_name', 'default')
+        student_id = data.get('student_id')
+        cohort = data.get('cohort')
         
-        # Load rubric and workflow
+        # Load rubric
         rubric = rubric_loader.load_rubric(rubric_name)
-        workflow = workflow_manager.load_workflow(workflow_name)
         
-        # Generate evaluation prompt
-        evaluation_prompt = workflow.generate_prompt(
-            student_response=student_response,
-            problem_statement=problem_statement,
-            rubric=rubric
+        # Near-identical earlier submissions to the same problem can share an evaluation
+        duplicate_key = similarity_index.make_key(
+            rubric_name, workflow_name, data.get('mode', 'standard'), problem_statement
+        )
+        reused_evaluation, near_duplicate = check_near_duplicate(
+            duplicate_key, student_response, problem_statement, rubric, student_id, get_tenant(data)
         )
         
-        # Use Gemini to evaluate
-        model = genai.GenerativeModel('gemini-flash')
-        response = model.generate_content(evaluation_prompt)
+        if reused_evaluation is not None:
+            evaluation_result = {
+                'raw_response': None,
+                'rubric_name': rubric_name,
+                'workflow_name': workflow_name,
+                'evaluation': reused_evaluation
+            }
+        elif data.get('mode') == 'cascade':
+            # Only the LLM tiers need a scheduler slot; the lexical screen runs locally
+            def generate(prompt):
+                with scheduler.slot('batch', tenant=get_tenant(data)):
+                    return llm_client.generate(prompt, endpoint='evaluate', idempotent=True).text
+            
+            # Lexical screen, then quick check; only borderline cases get the full workflow
+            cascade_result = cascade.evaluate(
+                student_response=student_response,
+                problem_statement=problem_statement,
+                rubric=rubric,
+                full_workflow=workflow_name if workflow_name != 'default' else 'reflection_analysis',
+                generate=generate,
+                parse_full_response=parse_gemini_response
+            )
+            
+            evaluation_result = {
+                'raw_response': cascade_result['raw_response'],
+                'rubric_name': rubric_name,
+                'workflow_name': workflow_name,
+                'evaluation': cascade_result['evaluation']
+            }
+        else:
+            workflow = workflow_manager.load_workflow(workflow_name)
+            
+            # Generate evaluation prompt
+            evaluation_prompt = workflow.generate_prompt(
+                student_response=student_response,
+                problem_statement=problem_statement,
+                rubric=rubric
+            )
+            
+            # Use Gemini to evaluate; evaluation prompts are idempotent, so they may be hedged
+            with scheduler.slot('batch', tenant=get_tenant(data)):
+                response = llm_client.generate(evaluation_prompt, endpoint='evaluate', idempotent=True)
+            
+            # Parse response
+            evaluation_result = {
+                'raw_response': response.text,
+                'rubric_name': rubric_name,
+                'workflow_name': workflow_name,
+                'evaluation': parse_gemini_response(response.text, rubric)
+            }
         
-        # Parse response
-        evaluation_result = {
-            'raw_response': response.text,
-            'rubric_name': rubric_name,
-            'workflow_name': workflow_name,
-            'evaluation': parse_gemini_response(response.text, rubric)
-        }
+        finish_evaluation(evaluation_result, near_duplicate, reused_evaluation is not None, duplicate_key,
+                          student_response, student_id, cohort)
         
         return jsonify(evaluation_result)
         
+    except SchedulerTimeout as e:
+        return jsonify({'error': str(e)}), 503
+    except LLMDeadlineExceeded as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -94,6 +197,8 @@ def execute_colab_workflow():
         student_response = data.get('student_response', '')
         problem_statement = data.get('problem_statement', '')
         rubric_name = data.get('rubric_name', 'genai_assessment')
+        student_id = data.get('student_id')
+        cohort = data.get('cohort')
         
         # Load rubric data
         rubric_data = rubric_loader.load_rubric(rubric_name)
@@ -107,16 +212,30 @@ def execute_colab_workflow():
         }
         
         # Execute the Colab workflow
-        result = colab_manager.execute_workflow(workflow_name, parameters)
+        with scheduler.slot('batch', tenant=get_tenant(data)):
+            result = colab_manager.execute_workflow(workflow_name, parameters)
         
         if result['status'] == 'success':
             # Extract evaluation results from notebook execution
             evaluation_results = extract_colab_results(result['results'])
             
+            evaluation_store.record(
+                evaluation_results,
+                rubric_name=rubric_name,
+                workflow_name=workflow_name,
+                source='colab',
+                student_id=student_id,
+                cohort=cohort
+            )
+            
+            # Keep the executed notebook; it's rendered to HTML only if someone opens the report
+            job_id = report_store.save(result['notebook_executed'], secrets=[parameters['gemini_api_key']])
+            
             return jsonify({
                 'status': 'success',
                 'evaluation': evaluation_results,
-                'execution_details': result['results'],
+                'job_id': job_id,
+                'report_url': f'/api/reports/{job_id}',
                 'workflow_name': workflow_name,
                 'rubric_name': rubric_name
             })
@@ -126,6 +245,78 @@ def execute_colab_workflow():
                 'error': result['error']
             }), 500
             
+    except SchedulerTimeout as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/evaluations', methods=['GET'])
+def get_evaluations():
+    # Stored evaluations carry student IDs and near-duplicate matches; staff only
+    denied = check_admin_token()
+    if denied is not None:
+        return denied
+    try:
+        evaluations = evaluation_store.list_evaluations(
+            student_id=request.args.get('student_id'),
+            rubric_name=request.args.get('rubric_name'),
+            workflow_name=request.args.get('workflow_name'),
+            cohort=request.args.get('cohort'),
+            since=request.args.get('since', type=float),
+            until=request.args.get('until', type=float),
+            limit=request.args.get('limit', 100, type=int)
+        )
+        return jsonify(evaluations)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/analytics/cohort', methods=['GET'])
+def get_cohort_analytics():
+    try:
+        rubric_name = request.args.get('rubric_name')
+        if not rubric_name:
+            return jsonify({'error': 'rubric_name is required'}), 400
+        
+        percentiles = request.args.get('percentiles')
+        analytics = evaluation_store.cohort_analytics(
+            rubric_name=rubric_name,
+            workflow_name=request.args.get('workflow_name'),
+            cohort=request.args.get('cohort'),
+            since=request.args.get('since', type=float),
+            until=request.args.get('until', type=float),
+            percentiles=[float(p) for p in percentiles.split(',')] if percentiles else None,
+            bins=request.args.get('bins', 10, type=int)
+        )
+        return jsonify(analytics)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/scheduler/metrics', methods=['GET'])
+def get_scheduler_metrics():
+    return jsonify(scheduler.get_metrics())
+
+@app.route('/api/llm/metrics', methods=['GET'])
+def get_llm_metrics():
+    return jsonify(llm_client.get_metrics())
+
+@app.route('/api/reports/<job_id>', methods=['GET'])
+def get_report(job_id):
+    try:
+        if not report_store.exists(job_id):
+            return jsonify({'error': 'Report not found'}), 404
+        
+        etag = report_store.get_etag(job_id)
+        # Weak comparison, as If-None-Match requires; also matches '*'
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            # An open handle survives a concurrent eviction of the cached HTML
+            response = send_file(report_store.open_report(job_id), mimetype='text/html', conditional=False)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -139,26 +330,176 @@ def start_live_interview():
         interview_stage = data.get('stage', 'initial')
         student_input = data.get('student_input', '')
         
-        # Generate interview question based on stage
-        interview_prompt = generate_interview_prompt(
-            problem_statement=problem_statement,
-            key_concepts=key_concepts,
-            stage=interview_stage,
-            student_input=student_input
-        )
-        
-        model = genai.GenerativeModel('gemini-flash')
-        response = model.generate_content(interview_prompt)
+        cached = False
+        if interview_stage == 'initial':
+            # The opening depends only on the problem and concepts; serve it from the pool
+            interviewer_response, cached = opening_cache.get(problem_statement, key_concepts)
+        else:
+            # Generate interview question based on stage
+            interview_prompt = generate_interview_prompt(
+                problem_statement=problem_statement,
+                key_concepts=key_concepts,
+                stage=interview_stage,
+                student_input=student_input
+            )
+            
+            with scheduler.slot('interactive', tenant=get_tenant(data)):
+                response = llm_client.generate(interview_prompt, endpoint='live_interview')
+            interviewer_response = response.text
         
         return jsonify({
-            'interviewer_response': response.text,
+            'interviewer_response': interviewer_response,
             'stage': interview_stage,
-            'next_stage': get_next_stage(interview_stage)
+            'next_stage': get_next_stage(interview_stage),
+            'cached': cached
         })
         
+    except SchedulerTimeout as e:
+        return jsonify({'error': str(e)}), 503
+    except LLMDeadlineExceeded as e:
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/interview-problems', methods=['POST'])
+def register_interview_problem():
+    try:
+        data = request.json
+        
+        problem_statement = data.get('problem_statement', '')
+        key_concepts = data.get('key_concepts', [])
+        if not problem_statement.strip():
+            return jsonify({'error': 'problem_statement is required'}), 400
+        
+        # Opening questions are generated in the background
+        problem_id = opening_cache.register(problem_statement, key_concepts)
+        return jsonify({'problem_id': problem_id, 'pool_size': opening_cache.pool_size}), 202
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def check_admin_token():
+    """Error response for admin routes, or None if the request may proceed"""
+    if not profiler.admin_enabled:
+        return jsonify({'error': 'Admin endpoints are disabled; set ADMIN_TOKEN to enable them'}), 403
+    if not profiler.is_authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Unauthorized'}), 401
+    return None
+
+@app.route('/api/admin/profiling', methods=['GET', 'POST'])
+def admin_profiling():
+    denied = check_admin_token()
+    if denied is not None:
+        return denied
+    try:
+        if request.method == 'POST':
+            data = request.json or {}
+            interval_ms = data.get('interval_ms')
+            profiler.configure(
+                sample_rate=data.get('sample_rate'),
+                interval=float(interval_ms) / 1000 if interval_ms is not None else None,
+                output_format=data.get('format')
+            )
+        
+        settings = profiler.get_settings()
+        settings['profiles'] = profiler.list_profiles()[:50]
+        return jsonify(settings)
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/admin/profiles/<path:filename>', methods=['GET'])
+def get_profile(filename):
+    denied = check_admin_token()
+    if denied is not None:
+        return denied
+    return send_from_directory(os.path.abspath(profiler.output_dir), filename, as_attachment=True)
+
+def is_reusable(evaluation):
+    """Only model-scored evaluations with a numeric overall score may be reused for near-duplicates"""
+    score = evaluation.get('overall_score')
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        return False
+    return (evaluation.get('cascade') or {}).get('decided_by') != 'lexical'
+
+def find_near_duplicate(duplicate_key, student_response, student_id):
+    """Look for a near-duplicate earlier submission.
+    
+    Returns (match report, prior evaluation prepared for this student), or
+    (None, None). Matches at or above the reuse threshold are marked 'reused';
+    weaker ones still need verify_near_duplicate. An evaluation reused for a
+    different student has the original student's evidence and quotes stripped.
+    """
+    match = similarity_index.query(duplicate_key, student_response)
+    if match is None or match['similarity'] < NEAR_DUPLICATE_VERIFY_THRESHOLD:
+        return None, None
+    
+    report = {
+        'similarity': round(match['similarity'], 3),
+        'matched_student_id': match['student_id'],
+        'matched_at': match['created_at'],
+        'same_student': student_id is not None and student_id == match['student_id']
+    }
+    prior_evaluation = match['evaluation']
+    if not report['same_student']:
+        prior_evaluation = strip_student_specific(prior_evaluation, student_response)
+    if match['similarity'] >= NEAR_DUPLICATE_REUSE_THRESHOLD:
+        report['action'] = 'reused'
+    return report, prior_evaluation
+
+def verify_near_duplicate(report, prior_evaluation, quick_text):
+    """Reuse a weaker match only if the quick check agrees with its overall score"""
+    quick_score = parse_quick_score(quick_text)
+    prior_score = prior_evaluation.get('overall_score')
+    report['quick_score'] = quick_score
+    if (quick_score is not None and isinstance(prior_score, (int, float))
+            and abs(quick_score - prior_score) <= NEAR_DUPLICATE_SCORE_TOLERANCE):
+        report['action'] = 'verified'
+        return prior_evaluation
+    
+    report['action'] = 'reevaluated'
+    return None
+
+def check_near_duplicate(duplicate_key, student_response, problem_statement, rubric, student_id, tenant):
+    """Returns (evaluation to reuse or None, match report or None).
+    
+    Every match is reported, which doubles as a plagiarism signal.
+    """
+    report, prior_evaluation = find_near_duplicate(duplicate_key, student_response, student_id)
+    if report is None or report.get('action') == 'reused':
+        return prior_evaluation, report
+    
+    quick_prompt = workflow_manager.load_workflow('quick_assessment').generate_prompt(
+        student_response=student_response,
+        problem_statement=problem_statement,
+        rubric=rubric
+    )
+    with scheduler.slot('batch', tenant=tenant):
+        quick_text = llm_client.generate(quick_prompt, endpoint='evaluate', idempotent=True).text
+    
+    return verify_near_duplicate(report, prior_evaluation, quick_text), report
+
+def finish_evaluation(evaluation_result, near_duplicate, reused, duplicate_key, student_response, student_id,
+                      cohort):
+    """Report near-duplicates, index fresh evaluations and persist an /api/evaluate result"""
+    stored_evaluation = evaluation_result['evaluation']
+    if near_duplicate is not None:
+        # The matched student's identity goes only into the stored record, for staff review
+        stored_evaluation = dict(stored_evaluation, near_duplicate=near_duplicate)
+        evaluation_result['near_duplicate'] = {
+            key: value for key, value in near_duplicate.items() if key != 'matched_student_id'
+        }
+    if not reused and is_reusable(evaluation_result['evaluation']):
+        similarity_index.add(duplicate_key, student_response, evaluation_result['evaluation'], student_id)
+    
+    evaluation_store.record(
+        stored_evaluation,
+        rubric_name=evaluation_result['rubric_name'],
+        workflow_name=evaluation_result['workflow_name'],
+        source='evaluate',
+        student_id=student_id,
+        cohort=cohort
+    )
+
 def parse_gemini_response(response_text, rubric):
     # Simple parsing - in production, this would be more sophisticated
     try:
@@ -0,0 +1,223 @@
+import asyncio
+import os
+from quart import Quart, request, jsonify
+from quart_cors import cors
+from llm_client import LLMDeadlineExceeded
+from app import (
+    rubric_loader,
+    workflow_manager,
+    colab_manager,
+    llm_client,
+    opening_cache,
+    similarity_index,
+    find_near_duplicate,
+    verify_near_duplicate,
+    finish_evaluation,
+    parse_gemini_response,
+    generate_interview_prompt,
+    get_next_stage
+)
+
+# ASGI counterpart of app.py for high-concurrency serving. Each in-flight
+# Gemini call is a coroutine rather than a pinned worker thread, so a single
+# process can hold thousands of outstanding LLM requests.
+#
+# /api/evaluate shares near-duplicate reuse and persistence with app.py.
+# Cascade mode is only served by app.py, and Gemini calls here are bounded by
+# ASYNC_MAX_INFLIGHT_LLM rather than app.py's priority scheduler.
+#
+# Run with: hypercorn async_app:app --bind 0.0.0.0:5000
+
+app = Quart(__name__)
+app = cors(app)
+
+DEFAULT_TIMEOUT = float(os.getenv('ASYNC_REQUEST_TIMEOUT', '60'))
+MAX_TIMEOUT = float(os.getenv('ASYNC_MAX_REQUEST_TIMEOUT', '300'))
+MAX_INFLIGHT = int(os.getenv('ASYNC_MAX_INFLIGHT_LLM', '4096'))
+
+_llm_slots = None
+
+def get_llm_slots() -> asyncio.Semaphore:
+    # Created lazily so the semaphore binds to the serving event loop
+    global _llm_slots
+    if _llm_slots is None:
+        _llm_slots = asyncio.Semaphore(MAX_INFLIGHT)
+    return _llm_slots
+
+def get_request_deadline() -> float:
+    """Per-request deadline in seconds, overridable with the X-Request-Timeout header"""
+    try:
+        timeout = float(request.headers.get('X-Request-Timeout', DEFAULT_TIMEOUT))
+    except ValueError:
+        timeout = DEFAULT_TIMEOUT
+    return max(0.1, min(timeout, MAX_TIMEOUT))
+
+async def generate_async(prompt: str, deadline: float, endpoint: str, idempotent: bool = False) -> str:
+    """Run one Gemini call under the request deadline.
+
+    The deadline covers waiting for an LLM slot as well as the call itself.
+    If the client disconnects, Quart cancels the handler task; the
+    cancellation propagates into the SDK call and aborts the upstream request.
+    """
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + deadline
+
+    async def call():
+        async with get_llm_slots():
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                raise LLMDeadlineExceeded(f'{endpoint} request deadline expired waiting for an LLM slot')
+            response = await llm_client.generate_async(prompt, endpoint=endpoint, idempotent=idempotent,
+                                                       deadline=remaining)
+            return response.text
+
+    return await asyncio.wait_for(call(), timeout=deadline)
+
+def remaining_time(expires_at: float) -> float:
+    remaining = expires_at - asyncio.get_running_loop().time()
+    if remaining <= 0:
+        raise LLMDeadlineExceeded('Request deadline expired')
+    return remaining
+
+@app.route('/api/evaluate', methods=['POST'])
+async def evaluate_student():
+    try:
+        data = await request.get_json()
+        deadline = get_request_deadline()
+        expires_at = asyncio.get_running_loop().time() + deadline
+        
+        mode = data.get('mode', 'standard')
+        if mode != 'standard':
+            return jsonify({'error': f"Mode '{mode}' is not supported by the async server; use app.py"}), 400
+        
+        student_response = data.get('student_response', '')
+        problem_statement = data.get('problem_statement', '')
+        rubric_name = data.get('rubric_name', 'default')
+        workflow_name = data.get('workflow_name', 'default')
+        student_id = data.get('student_id')
+        cohort = data.get('cohort')
+        
+        # Rubrics and workflows are read from disk; keep that off the event loop
+        rubric = await asyncio.to_thread(rubric_loader.load_rubric, rubric_name)
+        
+        # Near-identical earlier submissions to the same problem can share an evaluation
+        duplicate_key = similarity_index.make_key(rubric_name, workflow_name, mode, problem_statement)
+        near_duplicate, reused_evaluation = find_near_duplicate(duplicate_key, student_response, student_id)
+        if near_duplicate is not None and near_duplicate.get('action') != 'reused':
+            quick_workflow = await asyncio.to_thread(workflow_manager.load_workflow, 'quick_assessment')
+            quick_prompt = quick_workflow.generate_prompt(
+                student_response=student_response,
+                problem_statement=problem_statement,
+                rubric=rubric
+            )
+            quick_text = await generate_async(quick_prompt, remaining_time(expires_at), 'evaluate', idempotent=True)
+            reused_evaluation = verify_near_duplicate(near_duplicate, reused_evaluation, quick_text)
+        
+        if reused_evaluation is not None:
+            evaluation_result = {
+                'raw_response': None,
+                'rubric_name': rubric_name,
+                'workflow_name': workflow_name,
+                'evaluation': reused_evaluation
+            }
+        else:
+            workflow = await asyncio.to_thread(workflow_manager.load_workflow, workflow_name)
+            
+            # Generate evaluation prompt
+            evaluation_prompt = workflow.generate_prompt(
+                student_response=student_response,
+                problem_statement=problem_statement,
+                rubric=rubric
+            )
+            
+            response_text = await generate_async(evaluation_prompt, remaining_time(expires_at), 'evaluate',
+                                                 idempotent=True)
+            
+            evaluation_result = {
+                'raw_response': response_text,
+                'rubric_name': rubric_name,
+                'workflow_name': workflow_name,
+                'evaluation': parse_gemini_response(response_text, rubric)
+            }
+        
+        finish_evaluation(evaluation_result, near_duplicate, reused_evaluation is not None, duplicate_key,
+                          student_response, student_id, cohort)
+        
+        return jsonify(evaluation_result)
+
+    except (asyncio.TimeoutError, LLMDeadlineExceeded):
+        return jsonify({'error': 'Evaluation exceeded request deadline'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/live-interview', methods=['POST'])
+async def start_live_interview():
+    try:
+        data = await request.get_json()
+        deadline = get_request_deadline()
+
+        problem_statement = data.get('problem_statement', '')
+        key_concepts = data.get('key_concepts', [])
+        interview_stage = data.get('stage', 'initial')
+        student_input = data.get('student_input', '')
+
+        cached = False
+        if interview_stage == 'initial':
+            # Pool hits resolve immediately. A cold miss is generated once on the cache's own
+            # executor, and every waiting request awaits the same future without holding a thread.
+            future, cached = opening_cache.get_future(problem_statement, key_concepts)
+            # Shielded so one request timing out doesn't cancel the opening others are waiting on
+            response_text = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=deadline)
+        else:
+            interview_prompt = generate_interview_prompt(
+                problem_statement=problem_statement,
+                key_concepts=key_concepts,
+                stage=interview_stage,
+                student_input=student_input
+            )
+
+            response_text = await generate_async(interview_prompt, deadline, 'live_interview')
+
+        return jsonify({
+            'interviewer_response': response_text,
+            'stage': interview_stage,
+            'next_stage': get_next_stage(interview_stage),
+            'cached': cached
+        })
+
+    except (asyncio.TimeoutError, LLMDeadlineExceeded):
+        return jsonify({'error': 'Interview turn exceeded request deadline'}), 504
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/llm/metrics', methods=['GET'])
+async def get_llm_metrics():
+    return jsonify(llm_client.get_metrics())
+
+@app.route('/api/rubrics', methods=['GET'])
+async def get_rubrics():
+    try:
+        rubrics = await asyncio.to_thread(rubric_loader.list_rubrics)
+        return jsonify(rubrics)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/workflows', methods=['GET'])
+async def get_workflows():
+    try:
+        workflows = await asyncio.to_thread(workflow_manager.list_workflows)
+        return jsonify(workflows)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/colab-workflows', methods=['GET'])
+async def get_colab_workflows():
+    try:
+        # Reading notebooks is file I/O; keep it off the event loop
+        def collect_workflow_info():
+            return [colab_manager.get_workflow_info(workflow) for workflow in colab_manager.list_workflows()]
+
+        workflow_info = await asyncio.to_thread(collect_workflow_info)
+        return jsonify(workflow_info)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,38 +1,74 @@
 import nbformat
 import os
 import json
+import re
 import tempfile
+import threading
+import uuid
 from nbconvert import HTMLExporter, PythonExporter
 from nbconvert.preprocessors import ExecutePreprocessor
 import google.generativeai as genai
 from typing import Dict, List, Any, Tuple
+from notebook_compiler import NotebookCompiler, UnsupportedNotebookError
+
+# 'kernel' always uses ExecutePreprocessor; 'inprocess' and 'process' run the
+# compiled module in this process or in a worker process, falling back to the
+# kernel for notebooks that need one
+EXECUTION_MODES = ('kernel', 'inprocess', 'process')
 
 class ColabWorkflowExecutor:
-    def __init__(self):
+    def __init__(self, execution_mode: str = None, compiled_dir: str = 'colab_workflows/.compiled'):
         self.execution_timeout = 600  # 10 minutes
+        self.execution_mode = execution_mode or os.getenv('COLAB_EXECUTION_MODE', 'kernel')
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{self.execution_mode}', expected one of {EXECUTION_MODES}")
+        self.compiler = NotebookCompiler(cache_dir=compiled_dir) if self.execution_mode != 'kernel' else None
         
     def execute_notebook(self, notebook_path: str, parameters: Dict[str, Any] = None) -> Dict[str, Any]:
         """Execute a Jupyter notebook and return results"""
         try:
-            # Read the notebook
-            with open(notebook_path, 'r', encoding='utf-8') as f:
-                nb = nbformat.read(f, as_version=4)
+            nb = None
+            execution_mode = 'kernel'
             
-            # Inject parameters if provided
-            if parameters:
-                nb = self._inject_parameters(nb, parameters)
+            # Try the kernel-free fast path first
+            if self.compiler is not None:
+                try:
+                    nb = self.compiler.execute(
+                        notebook_path,
+                        parameters or {},
+                        in_process=self.execution_mode == 'inprocess',
+                        timeout=self.execution_timeout
+                    )
+                    execution_mode = self.execution_mode
+                except UnsupportedNotebookError:
+                    nb = None
             
-            # Execute the notebook
-            ep = ExecutePreprocessor(timeout=self.execution_timeout, kernel_name='python3')
-            ep.preprocess(nb, {'metadata': {'path': os.path.dirname(notebook_path)}})
+            if nb is None:
+                # Read the notebook
+                with open(notebook_path, 'r', encoding='utf-8') as f:
+                    nb = nbformat.read(f, as_version=4)
+                
+                # Inject parameters if provided
+                if parameters:
+                    nb = self._inject_parameters(nb, parameters)
+                
+                # Execute the notebook
+                ep = ExecutePreprocessor(timeout=self.execution_timeout, kernel_name='python3')
+                ep.preprocess(nb, {'metadata': {'path': os.path.dirname(notebook_path)}})
             
             # Extract results
             results = self._extract_results(nb)
             
+            # The kernel path raises on cell errors; mirror that for compiled runs
+            if results['errors']:
+                error = results['errors'][-1]
+                raise RuntimeError(f"{error['name']}: {error['value']}")
+            
             return {
                 'status': 'success',
                 'results': results,
-                'notebook_executed': nb
+                'notebook_executed': nb,
+                'execution_mode': execution_mode
             }
             
         except Exception as e:
@@ -154,12 +190,34 @@ class ColabWorkflowManager:
                     "outputs": [],
                     "source": [
                         "import google.generativeai as genai\n",
+                        "from google.api_core import exceptions as google_exceptions\n",
                         "import json\n",
+                        "import random\n",
                         "import re\n",
+                        "import time\n",
                         "\n",
                         "# Configure Gemini\n",
                         "genai.configure(api_key=gemini_api_key)\n",
-                        "model = genai.GenerativeModel('gemini-flash')"
+                        "model = genai.GenerativeModel('gemini-flash')\n",
+                        "\n",
+                        "# Every call gets a deadline and bounded retries with jittered backoff\n",
+                        "LLM_TIMEOUT = 60\n",
+                        "LLM_MAX_RETRIES = 2\n",
+                        "RETRYABLE_ERRORS = (\n",
+                        "    google_exceptions.DeadlineExceeded,\n",
+                        "    google_exceptions.ServiceUnavailable,\n",
+                        "    google_exceptions.ResourceExhausted,\n",
+                        "    google_exceptions.InternalServerError\n",
+                        ")\n",
+                        "\n",
+                        "def generate_content(prompt):\n",
+                        "    for attempt in range(LLM_MAX_RETRIES + 1):\n",
+                        "        try:\n",
+                        "            return model.generate_content(prompt, request_options={'timeout': LLM_TIMEOUT})\n",
+                        "        except RETRYABLE_ERRORS:\n",
+                        "            if attempt == LLM_MAX_RETRIES:\n",
+                        "                raise\n",
+                        "            time.sleep(random.uniform(0, 0.5 * 2 ** attempt))"
                     ]
                 },
                 {
@@ -183,7 +241,7 @@ class ColabWorkflowManager:
                         "    Return as JSON: {{\"score\": X, \"feedback\": \"...\", \"strengths\": [...], \"improvements\": [...]}}\n",
                         "    \"\"\"\n",
                         "    \n",
-                        "    response = model.generate_content(prompt)\n",
+                        "    response = generate_content(prompt)\n",
                         "    try:\n",
                         "        # Extract JSON from response\n",
                         "        json_match = re.search(r'\\{.*\\}', response.text, re.DOTALL)\n",
@@ -221,7 +279,7 @@ class ColabWorkflowManager:
                         "    Return as JSON with overall score 1-10.\n",
                         "    \"\"\"\n",
                         "    \n",
-                        "    ai_response = model.generate_content(prompt)\n",
+                        "    ai_response = generate_content(prompt)\n",
                         "    \n",
                         "    # Simple technique detection\n",
                         "    detected_techniques = []\n",
@@ -344,4 +402,147 @@ class ColabWorkflowManager:
                 'language': nb.metadata.get('kernelspec', {}).get('language', 'python')
             }
         except Exception as e:
-            return {'error': str(e)}
\ No newline at end of file
+            return {'error': str(e)}
+
+class NotebookReportStore:
+    """Stores executed workflow notebooks per job and renders them to HTML on demand.
+
+    Notebooks are written once when a job finishes. HTML is only produced
+    the first time a report is requested and is then cached on disk; the
+    cache is trimmed least-recently-used first once it exceeds
+    ``max_cache_bytes``. Only the newest ``max_notebooks`` notebooks are
+    kept (0 keeps all). Stored notebooks never change, so a report's ETag
+    only depends on the job and the renderer version.
+    """
+
+    RENDER_VERSION = '1'
+
+    def __init__(self, reports_dir: str = 'reports', max_cache_bytes: int = 200 * 1024 * 1024,
+                 max_notebooks: int = 10000):
+        self.notebooks_dir = os.path.join(reports_dir, 'notebooks')
+        self.html_dir = os.path.join(reports_dir, 'html')
+        self.max_cache_bytes = max_cache_bytes
+        self.max_notebooks = max_notebooks
+        self._lock = threading.Lock()
+        self._render_locks = {}
+        for directory in (self.notebooks_dir, self.html_dir):
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+    def save(self, nb: nbformat.NotebookNode, secrets: List[str] = None) -> str:
+        """Store an executed notebook and return its job id.
+
+        Any secret values (e.g. the injected API key) are masked before writing.
+        """
+        job_id = uuid.uuid4().hex
+        notebook_json = nbformat.writes(nb)
+        for secret in secrets or []:
+            if secret:
+                notebook_json = notebook_json.replace(secret, '***')
+
+        path = self._notebook_path(job_id)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(notebook_json)
+        os.replace(path + '.tmp', path)
+        self._prune_notebooks()
+        return job_id
+
+    def exists(self, job_id: str) -> bool:
+        return self._valid_job_id(job_id) and os.path.exists(self._notebook_path(job_id))
+
+    def get_etag(self, job_id: str) -> str:
+        """Unquoted entity tag for the job's report"""
+        return f'{job_id}-{self.RENDER_VERSION}'
+
+    def render(self, job_id: str) -> str:
+        """Return the path of the job's HTML report, rendering it on first request"""
+        if not self.exists(job_id):
+            raise FileNotFoundError(f"Report '{job_id}' not found")
+
+        html_path = self._html_path(job_id)
+        with self._lock:
+            render_lock = self._render_locks.setdefault(job_id, threading.Lock())
+
+        # Concurrent first requests for the same report render it only once
+        with render_lock:
+            if os.path.exists(html_path):
+                os.utime(html_path)  # mark as recently used for eviction
+            else:
+                with open(self._notebook_path(job_id), 'r', encoding='utf-8') as f:
+                    nb = nbformat.read(f, as_version=4)
+                body, _ = HTMLExporter().from_notebook_node(nb)
+                with open(html_path + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(body)
+                os.replace(html_path + '.tmp', html_path)
+                self._evict(keep=html_path)
+
+        with self._lock:
+            self._render_locks.pop(job_id, None)
+        return html_path
+
+    def open_report(self, job_id: str):
+        """Open the job's HTML report for reading.
+
+        Another request's render can evict the file between render() and
+        open(); in that case it is rendered again. An open file stays
+        readable even if it is evicted afterwards.
+        """
+        for _ in range(3):
+            try:
+                return open(self.render(job_id), 'rb')
+            except FileNotFoundError:
+                if not self.exists(job_id):
+                    raise
+        raise FileNotFoundError(f"Report '{job_id}' was evicted while being served")
+
+    def _evict(self, keep: str):
+        entries = []
+        for name in os.listdir(self.html_dir):
+            path = os.path.join(self.html_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_cache_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def _prune_notebooks(self):
+        """Drop the oldest stored notebooks, and their rendered reports, beyond max_notebooks"""
+        if not self.max_notebooks:
+            return
+        names = [name for name in os.listdir(self.notebooks_dir) if name.endswith('.ipynb')]
+        if len(names) <= self.max_notebooks:
+            return
+        entries = []
+        for name in names:
+            try:
+                entries.append((os.path.getmtime(os.path.join(self.notebooks_dir, name)), name))
+            except FileNotFoundError:
+                continue
+        for _, name in sorted(entries)[:len(entries) - self.max_notebooks]:
+            job_id = name[:-len('.ipynb')]
+            for path in (self._notebook_path(job_id), self._html_path(job_id)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def _valid_job_id(self, job_id: str) -> bool:
+        return bool(re.fullmatch(r'[0-9a-f]{32}', job_id or ''))
+
+    def _notebook_path(self, job_id: str) -> str:
+        return os.path.join(self.notebooks_dir, f'{job_id}.ipynb')
+
+    def _html_path(self, job_id: str) -> str:
+        return os.path.join(self.html_dir, f'{job_id}.html')
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import re
+from typing import Callable, Dict, List, Any, Optional
+
+# Words that appear throughout rubric descriptions but say nothing about the concept
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'basic', 'be', 'by', 'considers', 'considerations',
+    'demonstrates', 'effective', 'etc', 'for', 'generally', 'good', 'grasp', 'in',
+    'incorrect', 'is', 'it', 'lacks', 'like', 'limited', 'minimal', 'of', 'on', 'or', 'poor',
+    'proper', 'principles', 'shows', 'solid', 'some', 'strong', 'the', 'to', 'understanding',
+    'use', 'uses', 'with'
+}
+
+# Rough token counts used to estimate what each tier costs
+CHARS_PER_TOKEN = 4
+FULL_OUTPUT_TOKENS = 800
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r'[a-z][a-z0-9]+', text.lower())
+
+def stem(token: str) -> str:
+    """Crude suffix stripping so 'metrics'/'metric' and 'prompting'/'prompt' match"""
+    for suffix in ('ing', 'ers', 'er', 'es', 's'):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+def parse_quick_score(text: str) -> Optional[float]:
+    """Pull 'Overall Score: X/10' out of a quick_assessment response"""
+    match = re.search(r'overall\s+score\s*:?\s*\**\s*(\d+(?:\.\d+)?)\s*(?:/\s*10)?', text, re.IGNORECASE)
+    if not match:
+        return None
+    score = float(match.group(1))
+    return score if 0 <= score <= 10 else None
+
+class LexicalPrescorer:
+    """Scores a response by how much of each concept's rubric vocabulary it uses.
+
+    Concept names contribute double-weight terms; the words in the concept's
+    scoring criteria contribute single-weight terms. Coverage saturates at
+    ``saturation`` of the vocabulary weight, since a strong answer doesn't
+    have to repeat the rubric word for word.
+    """
+
+    def __init__(self, rubric: Dict, saturation: float = 0.35):
+        self.saturation = saturation
+        self.weights = rubric.get('overall_scoring', {}).get('weights', {})
+        self.vocabulary = {}
+
+        criteria = rubric.get('scoring_criteria', {})
+        for concept in rubric.get('key_concepts', list(criteria.keys())):
+            terms = {}
+            for description in criteria.get(concept, {}).values():
+                for token in tokenize(description):
+                    if token not in STOPWORDS:
+                        terms[stem(token)] = 1.0
+            for token in tokenize(concept):
+                if token not in STOPWORDS:
+                    terms[stem(token)] = 2.0
+            self.vocabulary[concept] = terms
+
+    def score(self, student_response: str) -> Dict[str, Any]:
+        tokens = tokenize(student_response)
+        present = {stem(token) for token in tokens}
+
+        concept_coverage = {}
+        for concept, terms in self.vocabulary.items():
+            total = sum(terms.values())
+            matched = sum(weight for term, weight in terms.items() if term in present)
+            concept_coverage[concept] = min(1.0, matched / (total * self.saturation)) if total else 0.0
+
+        if concept_coverage:
+            weight_total = sum(self.weights.get(concept, 1.0) for concept in concept_coverage)
+            coverage = sum(self.weights.get(concept, 1.0) * value
+                           for concept, value in concept_coverage.items()) / weight_total
+        else:
+            coverage = 0.0
+
+        return {
+            'word_count': len(tokens),
+            'coverage': coverage,
+            'concept_coverage': concept_coverage,
+            # Map coverage onto the rubric's 1-10 scale
+            'score': round(1 + 9 * coverage, 1),
+            'concept_scores': {concept: round(1 + 9 * value, 1) for concept, value in concept_coverage.items()}
+        }
+
+class EvaluationCascade:
+    """Three-tier evaluation: lexical prescorer, quick check, full analysis.
+
+    Tier 1 screens every submission locally. Only trivially short responses
+    that barely touch the rubric are settled there, at the scale minimum;
+    keyword coverage never raises a score, so listing rubric terms can't
+    earn one. Tier 2 runs the ``quick_assessment`` workflow and accepts
+    clear-cut scores. Only borderline or unparseable cases escalate to
+    the full analysis workflow. Each result records the deciding tier and the
+    estimated tokens that were saved relative to always running full analysis.
+    """
+
+    def __init__(self, workflow_manager, quick_workflow: str = 'quick_assessment',
+                 min_words: int = 10, min_coverage: float = 0.1, low_score: float = 4.0,
+                 high_score: float = 8.0, min_score: float = 1.0):
+        self.workflow_manager = workflow_manager
+        self.quick_workflow = quick_workflow
+        self.min_words = min_words
+        self.min_coverage = min_coverage
+        self.min_score = min_score
+        self.low_score = low_score
+        self.high_score = high_score
+        self._prescorers = {}
+
+    def evaluate(self, student_response: str, problem_statement: str, rubric: Dict, full_workflow: str,
+                 generate: Callable[[str], str], parse_full_response: Callable[[str, Dict], Dict]) -> Dict[str, Any]:
+        """Run the cascade; ``generate`` sends a prompt to the LLM and returns its text"""
+        full_prompt = self.workflow_manager.load_workflow(full_workflow).generate_prompt(
+            student_response=student_response,
+            problem_statement=problem_statement,
+            rubric=rubric
+        )
+        full_cost = estimate_tokens(full_prompt) + FULL_OUTPUT_TOKENS
+        tiers_run = ['lexical']
+        spent = 0
+
+        # Tier 1: local lexical screen
+        lexical = self._get_prescorer(rubric).score(student_response)
+        # Short answers that do use rubric terms go on to the quick check
+        if lexical['word_count'] < self.min_words and lexical['coverage'] < self.min_coverage:
+            evaluation = {
+                'overall_score': self.min_score,
+                'concept_scores': {
+                    concept: {'score': self.min_score, 'feedback': 'Insufficient response'}
+                    for concept in lexical['concept_scores']
+                },
+                'overall_feedback': 'The response is too short to evaluate.'
+            }
+            return self._result(evaluation, None, 'lexical', tiers_run, spent, full_cost, lexical)
+
+        # Tier 2: quick concept check
+        tiers_run.append('quick')
+        quick_prompt = self.workflow_manager.load_workflow(self.quick_workflow).generate_prompt(
+            student_response=student_response,
+            problem_statement=problem_statement,
+            rubric=rubric
+        )
+        quick_text = generate(quick_prompt)
+        spent += estimate_tokens(quick_prompt) + estimate_tokens(quick_text)
+        quick_score = parse_quick_score(quick_text)
+        lexical['quick_score'] = quick_score
+
+        if quick_score is not None and (quick_score <= self.low_score or quick_score >= self.high_score):
+            evaluation = {
+                'overall_score': quick_score,
+                'concept_scores': {},
+                'overall_feedback': quick_text
+            }
+            return self._result(evaluation, quick_text, 'quick', tiers_run, spent, full_cost, lexical)
+
+        # Tier 3: full analysis for borderline cases
+        tiers_run.append('full')
+        full_text = generate(full_prompt)
+        full_cost = estimate_tokens(full_prompt) + estimate_tokens(full_text)
+        spent += full_cost
+        evaluation = parse_full_response(full_text, rubric)
+        return self._result(evaluation, full_text, 'full', tiers_run, spent, full_cost, lexical)
+
+    def _result(self, evaluation: Dict, raw_response: Optional[str], decided_by: str, tiers_run: List[str],
+                spent: int, full_cost: int, lexical: Dict[str, Any]) -> Dict[str, Any]:
+        evaluation['cascade'] = {
+            'decided_by': decided_by,
+            'tiers_run': tiers_run,
+            'lexical_score': lexical['score'],
+            'lexical_coverage': round(lexical['coverage'], 3),
+            'quick_score': lexical.get('quick_score'),
+            'estimated_tokens_spent': spent,
+            # Negative when escalation to full analysis also paid for the quick check
+            'estimated_tokens_saved': full_cost - spent
+        }
+        return {'raw_response': raw_response, 'evaluation': evaluation}
+
+    def _get_prescorer(self, rubric: Dict) -> LexicalPrescorer:
+        key = hashlib.sha256(json.dumps(rubric, sort_keys=True).encode('utf-8')).hexdigest()
+        if key not in self._prescorers:
+            self._prescorers[key] = LexicalPrescorer(rubric)
+        return self._prescorers[key]
@@ -0,0 +1,295 @@
+import contextlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT,
+    cohort TEXT,
+    rubric_name TEXT NOT NULL,
+    workflow_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    overall_score REAL,
+    result TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS concept_scores (
+    evaluation_id INTEGER NOT NULL,
+    rubric_name TEXT NOT NULL,
+    workflow_name TEXT NOT NULL,
+    cohort TEXT,
+    created_at REAL NOT NULL,
+    concept TEXT NOT NULL,
+    score REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_student ON evaluations (student_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_rubric ON evaluations (rubric_name, workflow_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_evaluations_cohort ON evaluations (cohort, rubric_name, created_at);
+CREATE INDEX IF NOT EXISTS idx_concept_scores_rubric ON concept_scores (rubric_name, concept, created_at, score);
+CREATE INDEX IF NOT EXISTS idx_concept_scores_cohort ON concept_scores (cohort, rubric_name, concept, created_at, score);
+"""
+
+DEFAULT_PERCENTILES = [10, 25, 50, 75, 90]
+MAX_LIST_LIMIT = 1000
+MAX_HISTOGRAM_BINS = 100
+
+
+def _to_score(value: Any) -> Optional[float]:
+    """Coerce a score from a model response ('7', 7.5, {'score': 8}, 'N/A') to a float"""
+    if isinstance(value, dict):
+        value = value.get('score')
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.split('/')[0].strip())
+        except ValueError:
+            return None
+    return None
+
+
+def _concept_items(concept_scores: Any) -> List[tuple]:
+    """(concept, result) pairs from a model's concept_scores, whether a dict or a list of dicts"""
+    if isinstance(concept_scores, dict):
+        return list(concept_scores.items())
+    items = []
+    if isinstance(concept_scores, list):
+        for entry in concept_scores:
+            if isinstance(entry, dict):
+                concept = entry.get('concept') or entry.get('name')
+                if isinstance(concept, str):
+                    items.append((concept, entry))
+    return items
+
+
+class EvaluationStore:
+    """Append-only SQLite store of evaluation results.
+
+    Writes are queued and committed in batches by a background thread so the
+    request path never waits on disk. Concept scores are denormalized into
+    their own table, so cohort analytics are covering-index range scans
+    followed by vectorized aggregation in numpy.
+    """
+
+    def __init__(self, db_path: str = 'data/evaluations.db', batch_size: int = 500, flush_interval: float = 0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._ensure_data_dir()
+        self._init_schema()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _ensure_data_dir(self):
+        data_dir = os.path.dirname(self.db_path)
+        if data_dir and not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _init_schema(self):
+        with contextlib.closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def record(self, evaluation: Dict[str, Any], rubric_name: str, workflow_name: str, source: str,
+               student_id: str = None, cohort: str = None) -> None:
+        """Queue an evaluation result for persistence"""
+        self._queue.put({
+            'student_id': student_id,
+            'cohort': cohort,
+            'rubric_name': rubric_name,
+            'workflow_name': workflow_name,
+            'source': source,
+            'created_at': time.time(),
+            'evaluation': evaluation
+        })
+
+    def flush(self) -> None:
+        """Block until every queued evaluation has been committed"""
+        self._queue.join()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(conn, batch)
+            except Exception:
+                # Never let one bad batch kill the writer; later records would be silently dropped
+                logger.exception('Failed to persist %d evaluations', len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Dict[str, Any]]):
+        rows = []
+        for item in batch:
+            try:
+                rows.append(self._to_rows(item))
+            except Exception:
+                logger.exception('Skipping evaluation that could not be serialized')
+
+        try:
+            with conn:
+                for row, concept_rows in rows:
+                    self._insert(conn, row, concept_rows)
+        except sqlite3.Error:
+            # Retry one row per transaction so a single bad row doesn't cost the whole batch
+            for row, concept_rows in rows:
+                try:
+                    with conn:
+                        self._insert(conn, row, concept_rows)
+                except sqlite3.Error:
+                    logger.exception('Failed to persist evaluation for student %s', row[0])
+
+    def _to_rows(self, item: Dict[str, Any]):
+        evaluation = item['evaluation'] if isinstance(item['evaluation'], dict) else {}
+        row = (item['student_id'], item['cohort'], item['rubric_name'], item['workflow_name'],
+               item['source'], item['created_at'], _to_score(evaluation.get('overall_score')),
+               json.dumps(item['evaluation'], default=str))
+        concept_rows = []
+        for concept, concept_result in _concept_items(evaluation.get('concept_scores')):
+            score = _to_score(concept_result)
+            if score is not None:
+                concept_rows.append((item['rubric_name'], item['workflow_name'], item['cohort'],
+                                     item['created_at'], str(concept), score))
+        return row, concept_rows
+
+    def _insert(self, conn: sqlite3.Connection, row: tuple, concept_rows: List[tuple]):
+        cursor = conn.execute(
+            'INSERT INTO evaluations (student_id, cohort, rubric_name, workflow_name, source, '
+            'created_at, overall_score, result) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            row
+        )
+        conn.executemany(
+            'INSERT INTO concept_scores (evaluation_id, rubric_name, workflow_name, cohort, created_at, '
+            'concept, score) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(cursor.lastrowid,) + concept_row for concept_row in concept_rows]
+        )
+
+    def list_evaluations(self, student_id: str = None, rubric_name: str = None, workflow_name: str = None,
+                         cohort: str = None, since: float = None, until: float = None,
+                         limit: int = 100) -> List[Dict[str, Any]]:
+        """Return stored evaluations, newest first; ``limit`` is clamped to 1..MAX_LIST_LIMIT"""
+        limit = max(1, min(limit, MAX_LIST_LIMIT))
+        where, params = self._filters(student_id=student_id, rubric_name=rubric_name,
+                                      workflow_name=workflow_name, cohort=cohort, since=since, until=until)
+        with contextlib.closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT id, student_id, cohort, rubric_name, workflow_name, source, created_at, '
+                f'overall_score, result FROM evaluations {where} ORDER BY created_at DESC LIMIT ?',
+                params + [limit]
+            ).fetchall()
+
+        return [{
+            'id': row[0],
+            'student_id': row[1],
+            'cohort': row[2],
+            'rubric_name': row[3],
+            'workflow_name': row[4],
+            'source': row[5],
+            'created_at': row[6],
+            'overall_score': row[7],
+            'evaluation': json.loads(row[8])
+        } for row in rows]
+
+    def cohort_analytics(self, rubric_name: str, workflow_name: str = None, cohort: str = None,
+                         since: float = None, until: float = None, percentiles: List[float] = None,
+                         bins: int = 10) -> Dict[str, Any]:
+        """Per-concept score distributions, means and percentiles across a cohort.
+
+        Each concept's scores come from one covering-index range scan straight
+        into a numpy array; all statistics are then computed vectorized.
+        """
+        percentiles = percentiles or DEFAULT_PERCENTILES
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise ValueError('percentiles must be between 0 and 100')
+        if not 1 <= bins <= MAX_HISTOGRAM_BINS:
+            raise ValueError(f'bins must be between 1 and {MAX_HISTOGRAM_BINS}')
+        where, params = self._filters(rubric_name=rubric_name, workflow_name=workflow_name, cohort=cohort,
+                                      since=since, until=until)
+
+        with contextlib.closing(self._connect()) as conn:
+            overall = self._fetch_scores(
+                conn, f'SELECT overall_score FROM evaluations {where} AND overall_score IS NOT NULL', params
+            )
+            concepts = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT concept FROM concept_scores {where}', params
+            )]
+            concept_scores = {
+                concept: self._fetch_scores(
+                    conn, f'SELECT score FROM concept_scores {where} AND concept = ?', params + [concept]
+                )
+                for concept in concepts
+            }
+
+        return {
+            'rubric_name': rubric_name,
+            'workflow_name': workflow_name,
+            'cohort': cohort,
+            'evaluation_count': int(overall.size),
+            'overall': self._summarize(overall, percentiles, bins),
+            'concepts': {
+                concept: self._summarize(scores, percentiles, bins)
+                for concept, scores in concept_scores.items()
+            }
+        }
+
+    def _fetch_scores(self, conn: sqlite3.Connection, query: str, params: List[Any]) -> np.ndarray:
+        cursor = conn.execute(query, params)
+        return np.fromiter((row[0] for row in cursor), dtype=np.float64)
+
+    def _summarize(self, scores: np.ndarray, percentiles: List[float], bins: int) -> Dict[str, Any]:
+        if scores.size == 0:
+            return {'count': 0}
+        counts, edges = np.histogram(scores, bins=bins)
+        return {
+            'count': int(scores.size),
+            'mean': float(scores.mean()),
+            'std': float(scores.std()),
+            'min': float(scores.min()),
+            'max': float(scores.max()),
+            'percentiles': {str(p): float(v) for p, v in zip(percentiles, np.percentile(scores, percentiles))},
+            'histogram': {'counts': counts.tolist(), 'bin_edges': edges.tolist()}
+        }
+
+    def _filters(self, **filters):
+        clauses, params = ['1 = 1'], []
+        for column in ('student_id', 'rubric_name', 'workflow_name', 'cohort'):
+            if filters.get(column) is not None:
+                clauses.append(f'{column} = ?')
+                params.append(filters[column])
+        if filters.get('since') is not None:
+            clauses.append('created_at >= ?')
+            params.append(filters['since'])
+        if filters.get('until') is not None:
+            clauses.append('created_at < ?')
+            params.append(filters['until'])
+        return 'WHERE ' + ' AND '.join(clauses), params
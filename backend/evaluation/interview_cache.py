@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, List, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+VARIATION_STYLES = [
+    'warm and informal',
+    'concise and direct',
+    'curious, starting from a real-world angle'
+]
+
+class OpeningQuestionCache:
+    """Pool of pre-generated opening interviewer messages per problem.
+
+    The initial interview turn depends only on the problem statement and the
+    key concepts, so it can be generated ahead of time. Each problem keeps a
+    small pool of differently phrased openings; requests pick one at random.
+    On a cold miss, concurrent requests for the same problem share a single
+    in-flight generation instead of each calling the model.
+    """
+
+    def __init__(self, build_prompt: Callable[[str, List[str]], str], generate: Callable[[str, str], str],
+                 pool_size: int = 3, max_problems: int = 256, max_workers: int = 4,
+                 wait_timeout: float = 60):
+        self.build_prompt = build_prompt
+        self.generate = generate
+        self.pool_size = pool_size
+        self.max_problems = max_problems
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def problem_key(problem_statement: str, key_concepts: List[str]) -> str:
+        concepts = sorted({concept.strip().lower() for concept in key_concepts})
+        payload = json.dumps([problem_statement.strip(), concepts])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def register(self, problem_statement: str, key_concepts: List[str]) -> str:
+        """Start pre-generating the phrasing pool for a problem in the background.
+
+        The first phrasing is generated at interactive priority and published
+        as the entry's in-flight opening, so a class that starts right away
+        waits on it instead of generating its own.
+        """
+        key = self.problem_key(problem_statement, key_concepts)
+        with self._lock:
+            entry = self._get_entry(key)
+            if not entry['phrasings'] and entry['first'] is None:
+                self._start_first(entry, problem_statement, key_concepts)
+            else:
+                self._schedule_fill(entry, problem_statement, key_concepts)
+        return key
+
+    def get(self, problem_statement: str, key_concepts: List[str]) -> Tuple[str, bool]:
+        """Return an opening message and whether it came from the pool"""
+        key = self.problem_key(problem_statement, key_concepts)
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry['phrasings']:
+                self._schedule_fill(entry, problem_statement, key_concepts)
+                return random.choice(entry['phrasings']), True
+
+            owner = entry['first'] is None
+            if owner:
+                entry['first'] = Future()
+            first = entry['first']
+
+        if not owner:
+            return first.result(timeout=self.wait_timeout), False
+
+        # This request generates the opening in its own thread; others wait on the future
+        try:
+            text = self._generate_first(entry, problem_statement, key_concepts)
+        except Exception as e:
+            first.set_exception(e)
+            raise
+        first.set_result(text)
+        return text, False
+
+    def get_future(self, problem_statement: str, key_concepts: List[str]) -> Tuple[Future, bool]:
+        """Non-blocking get() for event loops: a future for the opening, and whether it was pooled.
+
+        A cold miss is generated on the cache's own executor, so waiting
+        callers don't each hold a thread.
+        """
+        key = self.problem_key(problem_statement, key_concepts)
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry['phrasings']:
+                self._schedule_fill(entry, problem_statement, key_concepts)
+                future = Future()
+                future.set_result(random.choice(entry['phrasings']))
+                return future, True
+            if entry['first'] is None:
+                self._start_first(entry, problem_statement, key_concepts)
+            return entry['first'], False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'problems': len(self._entries),
+                'pool_size': self.pool_size,
+                'pools': {key: len(entry['phrasings']) for key, entry in self._entries.items()}
+            }
+
+    def _get_entry(self, key: str) -> Dict[str, Any]:
+        # Caller holds self._lock
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        else:
+            self._entries[key] = {'phrasings': [], 'first': None, 'filling': False}
+            while len(self._entries) > self.max_problems:
+                self._entries.popitem(last=False)
+        return self._entries[key]
+
+    def _schedule_fill(self, entry: Dict[str, Any], problem_statement: str, key_concepts: List[str]):
+        # Caller holds self._lock
+        if entry['filling'] or len(entry['phrasings']) >= self.pool_size:
+            return
+        entry['filling'] = True
+        self._executor.submit(self._fill, entry, problem_statement, key_concepts)
+
+    def _start_first(self, entry: Dict[str, Any], problem_statement: str, key_concepts: List[str]):
+        """Generate the first phrasing in the background and publish it as entry['first']"""
+        # Caller holds self._lock
+        entry['first'] = Future()
+        entry['filling'] = True
+        self._executor.submit(self._fill, entry, problem_statement, key_concepts, entry['first'])
+
+    def _variant_prompt(self, problem_statement: str, key_concepts: List[str], variant: int) -> str:
+        style = VARIATION_STYLES[variant % len(VARIATION_STYLES)]
+        return (self.build_prompt(problem_statement, key_concepts)
+                + f"\nPhrase your opening in a {style} way.\n")
+
+    def _generate_first(self, entry: Dict[str, Any], problem_statement: str, key_concepts: List[str]) -> str:
+        """Foreground generation for a cold miss; a student is waiting on it"""
+        try:
+            text = self.generate(self._variant_prompt(problem_statement, key_concepts, 0), 'interactive')
+        except Exception:
+            with self._lock:
+                entry['first'] = None
+            raise
+
+        with self._lock:
+            entry['phrasings'].append(text)
+            entry['first'] = None
+            self._schedule_fill(entry, problem_statement, key_concepts)
+        return text
+
+    def _fill(self, entry: Dict[str, Any], problem_statement: str, key_concepts: List[str],
+              first: Future = None):
+        """Background generation of the pool.
+
+        When ``first`` is given, this fill owns the entry's in-flight opening:
+        it generates it at interactive priority and resolves the future. The
+        remaining phrasings are generated at batch priority.
+        """
+        try:
+            while True:
+                with self._lock:
+                    variant = len(entry['phrasings'])
+                    if variant >= self.pool_size:
+                        return
+                    if first is None and variant == 0 and entry['first'] is not None:
+                        # Another request is generating the first phrasing; it refills afterwards
+                        return
+                try:
+                    text = self.generate(self._variant_prompt(problem_statement, key_concepts, variant),
+                                         'interactive' if first is not None else 'batch')
+                except Exception as e:
+                    if first is not None:
+                        with self._lock:
+                            entry['first'] = None
+                        first.set_exception(e)
+                    raise
+                with self._lock:
+                    if len(entry['phrasings']) < self.pool_size:
+                        entry['phrasings'].append(text)
+                    if first is not None:
+                        entry['first'] = None
+                if first is not None:
+                    first.set_result(text)
+                    first = None
+        except Exception:
+            logger.exception('Failed to pre-generate interview openings')
+        finally:
+            with self._lock:
+                entry['filling'] = False
@@ -0,0 +1,152 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial edits don't matter"""
+    return ' '.join(re.findall(r'[a-z0-9]+', text.lower()))
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    words = normalize_text(text).split()
+    if len(words) <= size:
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+# Fields that only make sense for the student whose response was evaluated
+STUDENT_SPECIFIC_FIELDS = {'evidence', 'raw_response', 'student_id'}
+
+QUOTED_SPAN = re.compile(r'["\u201c]([^"\u201d]{12,})["\u201d]')
+
+def strip_student_specific(evaluation: Any, student_response: str) -> Any:
+    """Copy of a prior evaluation that is safe to show a different student.
+
+    Drops evidence fields, and any feedback text that quotes passages which
+    don't appear in ``student_response``; scores are kept as they are.
+    """
+    present = normalize_text(student_response)
+
+    def quotes_only_own_words(text: str) -> bool:
+        return all(normalize_text(quote) in present for quote in QUOTED_SPAN.findall(text))
+
+    def keep(key: Any, value: Any) -> bool:
+        if key in STUDENT_SPECIFIC_FIELDS:
+            return False
+        return not isinstance(value, str) or quotes_only_own_words(value)
+
+    def clean(value: Any) -> Any:
+        if isinstance(value, dict):
+            return {key: clean(item) for key, item in value.items() if keep(key, item)}
+        if isinstance(value, list):
+            return [clean(item) for item in value if keep(None, item)]
+        return value
+
+    return clean(evaluation)
+
+class NearDuplicateIndex:
+    """MinHash/LSH index of submitted responses for finding near-duplicates.
+
+    Each response is reduced to a MinHash signature over word shingles. The
+    signature is split into bands; responses sharing any band bucket become
+    candidates, and candidates are ranked by estimated Jaccard similarity
+    (the fraction of matching signature slots). Entries are grouped by an
+    index key, typically rubric + workflow + problem, and each group keeps
+    its most recent ``max_entries`` responses.
+    """
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, max_entries: int = 10000, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError('num_perm must be divisible by bands')
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        rng = np.random.RandomState(seed)
+        # 32-bit coefficients keep a * hash + b inside uint64 without overflow
+        self._a = rng.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._next_id = 0
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+    def signature(self, text: str) -> np.ndarray:
+        tokens = shingles(text)
+        if not tokens:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint64)
+        hashes = np.array(
+            [int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little')
+             for token in tokens],
+            dtype=np.uint64
+        )
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0)
+
+    def query(self, key: str, text: str) -> Optional[Dict[str, Any]]:
+        """Return the most similar stored entry for ``key`` and its similarity, if any"""
+        signature = self.signature(text)
+        with self._lock:
+            group = self._groups.get(key)
+            if group is None:
+                return None
+
+            candidates = set()
+            for band, bucket in enumerate(self._band_hashes(signature)):
+                candidates.update(group['buckets'][band].get(bucket, ()))
+
+            best, best_similarity = None, 0.0
+            for entry_id in candidates:
+                entry = group['entries'][entry_id]
+                similarity = float(np.mean(entry['signature'] == signature))
+                if similarity > best_similarity:
+                    best, best_similarity = entry, similarity
+
+        if best is None:
+            return None
+        return {
+            'similarity': best_similarity,
+            'evaluation': best['evaluation'],
+            'student_id': best['student_id'],
+            'created_at': best['created_at']
+        }
+
+    def add(self, key: str, text: str, evaluation: Dict[str, Any], student_id: str = None):
+        signature = self.signature(text)
+        with self._lock:
+            group = self._groups.setdefault(key, {
+                'entries': OrderedDict(),
+                'buckets': [{} for _ in range(self.bands)]
+            })
+            entry_id = self._next_id
+            self._next_id += 1
+            bands = self._band_hashes(signature)
+            group['entries'][entry_id] = {
+                'signature': signature,
+                'bands': bands,
+                'evaluation': evaluation,
+                'student_id': student_id,
+                'created_at': time.time()
+            }
+            for band, bucket in enumerate(bands):
+                group['buckets'][band].setdefault(bucket, []).append(entry_id)
+
+            while len(group['entries']) > self.max_entries:
+                old_id, old_entry = group['entries'].popitem(last=False)
+                for band, bucket in enumerate(old_entry['bands']):
+                    ids = group['buckets'][band][bucket]
+                    ids.remove(old_id)
+                    if not ids:
+                        del group['buckets'][band][bucket]
+
+    def _band_hashes(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
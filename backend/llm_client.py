@@ -0,0 +1,260 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any
+
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+
+# Upstream failures worth retrying; anything else is returned to the caller immediately
+RETRYABLE_ERRORS = (
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.InternalServerError,
+    TimeoutError,
+    ConnectionError
+)
+
+# Upstream errors that mean the call ran out of time
+TIMEOUT_ERRORS = (google_exceptions.DeadlineExceeded, TimeoutError)
+
+DEFAULT_DEADLINES = {
+    'evaluate': 60.0,
+    'live_interview': 20.0,
+    'default': 60.0
+}
+
+class LLMDeadlineExceeded(Exception):
+    """Raised when a call runs out of time before any attempt succeeds"""
+    pass
+
+class LLMClient:
+    """Wraps Gemini generate_content with deadlines, retries and hedging.
+
+    Every call runs under its endpoint's deadline and retries transient
+    upstream errors with exponential backoff and full jitter, as long as time
+    remains. Idempotent calls can also be hedged: if the first attempt has not
+    answered within the endpoint's recent p95 latency, a duplicate is sent
+    and whichever response arrives first wins.
+    """
+
+    def __init__(self, model_name: str = 'gemini-flash', deadlines: Dict[str, float] = None,
+                 max_retries: int = 2, backoff_base: float = 0.5, hedging: bool = False,
+                 hedge_default_delay: float = 2.0, hedge_min_samples: int = 20,
+                 latency_window: int = 200, max_workers: int = 32):
+        self.model_name = model_name
+        self.deadlines = dict(DEFAULT_DEADLINES, **(deadlines or {}))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.hedging = hedging
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latency_window = latency_window
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counters = {}
+        self._pool = None
+
+    def generate(self, prompt: str, endpoint: str = 'default', idempotent: bool = False,
+                 deadline: float = None):
+        """Blocking call; returns the SDK response object"""
+        self._count(endpoint, 'requests')
+        expires_at = time.monotonic() + (deadline or self.get_deadline(endpoint))
+        attempt = 0
+        while True:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                self._count(endpoint, 'deadline_exceeded')
+                raise LLMDeadlineExceeded(f'{endpoint} LLM call exceeded its deadline')
+            try:
+                if idempotent and self.hedging:
+                    return self._hedged_call(prompt, endpoint, remaining)
+                return self._accept(endpoint, self._timed_call(prompt, remaining))
+            except RETRYABLE_ERRORS as e:
+                out_of_time = expires_at - time.monotonic() <= 0
+                if attempt >= self.max_retries or out_of_time:
+                    self._raise_final(endpoint, e, out_of_time)
+                attempt += 1
+                self._count(endpoint, 'retries')
+                time.sleep(min(self._backoff(attempt), max(0.0, expires_at - time.monotonic())))
+
+    async def generate_async(self, prompt: str, endpoint: str = 'default', idempotent: bool = False,
+                             deadline: float = None):
+        """asyncio counterpart of generate(); losing hedges are cancelled"""
+        self._count(endpoint, 'requests')
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + (deadline or self.get_deadline(endpoint))
+        attempt = 0
+        while True:
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                self._count(endpoint, 'deadline_exceeded')
+                raise LLMDeadlineExceeded(f'{endpoint} LLM call exceeded its deadline')
+            try:
+                if idempotent and self.hedging:
+                    return await self._hedged_call_async(prompt, endpoint, remaining)
+                return self._accept(endpoint, await asyncio.wait_for(self._timed_call_async(prompt, remaining),
+                                                                      remaining))
+            except asyncio.TimeoutError:
+                self._count(endpoint, 'deadline_exceeded')
+                raise LLMDeadlineExceeded(f'{endpoint} LLM call exceeded its deadline')
+            except RETRYABLE_ERRORS as e:
+                out_of_time = expires_at - loop.time() <= 0
+                if attempt >= self.max_retries or out_of_time:
+                    self._raise_final(endpoint, e, out_of_time)
+                attempt += 1
+                self._count(endpoint, 'retries')
+                await asyncio.sleep(min(self._backoff(attempt), max(0.0, expires_at - loop.time())))
+
+    def _raise_final(self, endpoint: str, error: Exception, out_of_time: bool):
+        """Re-raise the last attempt's error, as LLMDeadlineExceeded if it was a timeout"""
+        if out_of_time or isinstance(error, TIMEOUT_ERRORS):
+            self._count(endpoint, 'deadline_exceeded')
+            raise LLMDeadlineExceeded(f'{endpoint} LLM call exceeded its deadline') from error
+        raise error
+
+    def get_deadline(self, endpoint: str) -> float:
+        return self.deadlines.get(endpoint, self.deadlines['default'])
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, self.backoff_base * 2 ** (attempt - 1))
+
+    def _timed_call(self, prompt: str, timeout: float):
+        """Returns (response, latency); only the result actually used is recorded"""
+        started = time.monotonic()
+        model = genai.GenerativeModel(self.model_name)
+        response = model.generate_content(prompt, request_options={'timeout': timeout})
+        return response, time.monotonic() - started
+
+    async def _timed_call_async(self, prompt: str, timeout: float):
+        started = time.monotonic()
+        model = genai.GenerativeModel(self.model_name)
+        response = await model.generate_content_async(prompt, request_options={'timeout': timeout})
+        return response, time.monotonic() - started
+
+    def _accept(self, endpoint: str, result):
+        """Record the latency of the response being returned and unwrap it"""
+        response, latency = result
+        self._record_latency(endpoint, latency)
+        self._count(endpoint, 'responses')
+        return response
+
+    def _hedged_call(self, prompt: str, endpoint: str, timeout: float):
+        started = time.monotonic()
+        pool = self._get_pool()
+        primary = pool.submit(self._timed_call, prompt, timeout)
+        done, _ = wait([primary], timeout=min(self._hedge_delay(endpoint), timeout))
+        if done:
+            return self._accept(endpoint, primary.result())
+
+        self._count(endpoint, 'hedges')
+        hedge = pool.submit(self._timed_call, prompt, timeout - (time.monotonic() - started))
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, timeout - (time.monotonic() - started)),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count(endpoint, 'hedge_wins')
+                    # The slower call can't be interrupted; it finishes in the pool and is discarded
+                    return self._accept(endpoint, future.result())
+                error = future.exception()
+        if error is not None:
+            raise error
+        raise TimeoutError(f'{endpoint} hedged LLM call timed out')
+
+    async def _hedged_call_async(self, prompt: str, endpoint: str, timeout: float):
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + timeout
+        primary = asyncio.ensure_future(self._timed_call_async(prompt, timeout))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=min(self._hedge_delay(endpoint), timeout))
+            if done:
+                return self._accept(endpoint, primary.result())
+
+            self._count(endpoint, 'hedges')
+            hedge = asyncio.ensure_future(self._timed_call_async(prompt, expires_at - loop.time()))
+            tasks.add(hedge)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=max(0.0, expires_at - loop.time()),
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count(endpoint, 'hedge_wins')
+                        return self._accept(endpoint, task.result())
+                    error = task.exception()
+            if error is not None:
+                raise error
+            raise asyncio.TimeoutError()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _hedge_delay(self, endpoint: str) -> float:
+        """p95 of recent latencies for the endpoint, once there are enough samples"""
+        with self._lock:
+            samples = sorted(self._latencies.get(endpoint, ()))
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def _record_latency(self, endpoint: str, latency: float):
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = deque(maxlen=self.latency_window)
+            self._latencies[endpoint].append(latency)
+
+    def _count(self, endpoint: str, counter: str):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {})
+            counters[counter] = counters.get(counter, 0) + 1
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Per-endpoint counters plus hedge rate and hedge win rate"""
+        endpoints = {}
+        with self._lock:
+            counters = {endpoint: dict(values) for endpoint, values in self._counters.items()}
+        for endpoint, values in counters.items():
+            requests, hedges, wins = values.get('requests', 0), values.get('hedges', 0), values.get('hedge_wins', 0)
+            endpoints[endpoint] = {
+                'requests': requests,
+                'responses': values.get('responses', 0),
+                'retries': values.get('retries', 0),
+                'deadline_exceeded': values.get('deadline_exceeded', 0),
+                'hedges': hedges,
+                'hedge_wins': wins,
+                'hedge_rate': hedges / requests if requests else 0.0,
+                'hedge_win_rate': wins / hedges if hedges else 0.0,
+                'hedge_delay': self._hedge_delay(endpoint),
+                'deadline': self.get_deadline(endpoint)
+            }
+        return {'hedging_enabled': self.hedging, 'endpoints': endpoints}
+
+def parse_deadlines(spec: str) -> Dict[str, float]:
+    """Parse 'evaluate:60,live_interview:15' into a deadline map (seconds)"""
+    deadlines = {}
+    for entry in (spec or '').split(','):
+        if ':' in entry:
+            endpoint, seconds = entry.split(':', 1)
+            deadlines[endpoint.strip()] = float(seconds)
+    return deadlines
@@ -0,0 +1,368 @@
+import ast
+import contextlib
+import hashlib
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Optional
+
+import nbformat
+from nbconvert import PythonExporter
+
+# Source patterns that only make sense inside an IPython kernel
+UNSUPPORTED_PATTERNS = [
+    re.compile(r'^\s*[%!]', re.MULTILINE),          # line/cell magics and shell escapes
+    re.compile(r'get_ipython\s*\('),
+    re.compile(r'^\s*(from|import)\s+IPython\b', re.MULTILINE),
+    re.compile(r'^\s*\w[\w.]*\s*\?\??\s*$', re.MULTILINE),  # help syntax: obj?
+]
+
+MODULE_TEMPLATE = '''# Auto-generated from {notebook_path}
+# Do not edit: regenerated whenever the notebook changes.
+import copy
+
+from notebook_compiler import compile_cells, run_cells
+
+NOTEBOOK_SOURCE = {notebook_source!r}
+
+CELLS = {cells!r}
+
+COMPILED_CELLS = compile_cells(CELLS)
+
+PARAMETER_DEFAULTS = {defaults!r}
+
+
+def run({signature}**extra_parameters):
+    parameters = {{{assignments}}}
+    # Defaults are shared across calls; each run gets its own copy so cells can't leak state
+    for name, value in parameters.items():
+        if value is PARAMETER_DEFAULTS[name]:
+            parameters[name] = copy.deepcopy(value)
+    parameters.update(extra_parameters)
+    return run_cells(COMPILED_CELLS, parameters)
+'''
+
+
+class UnsupportedNotebookError(Exception):
+    """Raised when a notebook needs a real kernel to execute"""
+    pass
+
+
+class _ThreadLocalStream:
+    """Stands in for sys.stdout/sys.stderr while notebooks run in-process.
+
+    Writes from a thread that is executing a notebook go to that run's buffer;
+    every other thread writes through to the original stream. Swapping
+    sys.stdout per run (contextlib.redirect_stdout) would mix the output of
+    notebooks running concurrently in different request threads.
+    """
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def write(self, text):
+        target = getattr(self._local, 'buffer', None) or self._default
+        return target.write(text)
+
+    def flush(self):
+        target = getattr(self._local, 'buffer', None) or self._default
+        target.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._default, name)
+
+
+_streams_lock = threading.Lock()
+
+
+def _routed_stream(name: str) -> _ThreadLocalStream:
+    with _streams_lock:
+        stream = getattr(sys, name)
+        if not isinstance(stream, _ThreadLocalStream):
+            stream = _ThreadLocalStream(stream)
+            setattr(sys, name, stream)
+        return stream
+
+
+@contextlib.contextmanager
+def _capture_output(stdout: io.StringIO, stderr: io.StringIO):
+    """Route this thread's stdout/stderr into the given buffers"""
+    out, err = _routed_stream('stdout'), _routed_stream('stderr')
+    out._local.buffer, err._local.buffer = stdout, stderr
+    try:
+        yield
+    finally:
+        out._local.buffer = err._local.buffer = None
+
+
+def compile_cells(cells: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Compile cell sources to code objects once, at module import time"""
+    compiled = []
+    for cell in cells:
+        filename = f"<cell {cell['cell_index']}>"
+        compiled.append({
+            'cell_index': cell['cell_index'],
+            'body': compile(cell['body'], filename, 'exec'),
+            'expression': compile(cell['expression'], filename, 'eval') if cell['expression'] else None
+        })
+    return compiled
+
+
+def run_cells(cells: List[Dict[str, Any]], parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Execute compiled cells in a shared namespace, capturing outputs per cell.
+
+    Mirrors what a kernel would record: stdout/stderr as stream outputs, the
+    value of a trailing expression as an execute result and exceptions as
+    error outputs. Execution stops at the first failing cell.
+    """
+    namespace = {'__name__': '__workflow__'}
+    namespace.update(parameters)
+    cell_outputs = []
+
+    for cell in cells:
+        stdout, stderr = io.StringIO(), io.StringIO()
+        outputs = []
+        failed = False
+        try:
+            with _capture_output(stdout, stderr):
+                exec(cell['body'], namespace)
+                value = None
+                if cell['expression']:
+                    value = eval(cell['expression'], namespace)
+        except Exception as e:
+            failed = True
+            error = {
+                'output_type': 'error',
+                'ename': type(e).__name__,
+                'evalue': str(e),
+                'traceback': traceback.format_exception(type(e), e, e.__traceback__)
+            }
+
+        if stdout.getvalue():
+            outputs.append({'output_type': 'stream', 'name': 'stdout', 'text': stdout.getvalue()})
+        if stderr.getvalue():
+            outputs.append({'output_type': 'stream', 'name': 'stderr', 'text': stderr.getvalue()})
+        if failed:
+            outputs.append(error)
+        elif value is not None:
+            outputs.append({'output_type': 'execute_result', 'data': {'text/plain': repr(value)}})
+
+        cell_outputs.append({'cell_index': cell['cell_index'], 'outputs': outputs})
+        if failed:
+            break
+
+    return cell_outputs
+
+
+def _run_module_file(module_path: str, parameters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Entry point for worker processes: load a compiled module by path and run it"""
+    module = _load_module(module_path)
+    return module.run(**parameters)
+
+
+def _load_module(module_path: str):
+    module_name = 'compiled_' + os.path.splitext(os.path.basename(module_path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class NotebookCompiler:
+    """Compiles workflow notebooks into plain Python modules.
+
+    The parameters cell becomes the keyword arguments of a ``run`` function,
+    so executing a workflow skips kernel startup and ZMQ messaging entirely.
+    Compiled modules are cached on disk next to the notebooks and in memory,
+    keyed by the notebook's content hash.
+    """
+
+    def __init__(self, cache_dir: str = 'colab_workflows/.compiled', max_workers: int = 2):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.exporter = PythonExporter()
+        self._modules = {}
+        self._unsupported = {}
+        self._pool = None
+        self._ensure_cache_dir()
+
+    def _ensure_cache_dir(self):
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def execute(self, notebook_path: str, parameters: Dict[str, Any], in_process: bool = True,
+                timeout: Optional[float] = None) -> nbformat.NotebookNode:
+        """Run a notebook through its compiled module and return it with outputs filled in.
+
+        Raises UnsupportedNotebookError if the notebook cannot be compiled.
+        """
+        with open(notebook_path, 'r', encoding='utf-8') as f:
+            nb = nbformat.read(f, as_version=4)
+
+        module_path = self.compile(notebook_path, nb)
+
+        if in_process:
+            future = self._run_in_thread(module_path, parameters)
+        else:
+            future = self._get_pool().submit(_run_module_file, module_path, parameters)
+        try:
+            cell_outputs = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f'Notebook execution timed out after {timeout} seconds')
+
+        return self._apply_outputs(nb, cell_outputs)
+
+    def compile(self, notebook_path: str, nb: nbformat.NotebookNode = None) -> str:
+        """Compile a notebook to a cached module and return the module path"""
+        if nb is None:
+            with open(notebook_path, 'r', encoding='utf-8') as f:
+                nb = nbformat.read(f, as_version=4)
+
+        notebook_json = nbformat.writes(nb)
+        # The template is part of the key so modules are regenerated when it changes
+        digest = hashlib.sha256((MODULE_TEMPLATE + notebook_json).encode('utf-8')).hexdigest()[:16]
+        workflow_name = os.path.splitext(os.path.basename(notebook_path))[0]
+        module_path = os.path.join(self.cache_dir, f'{workflow_name}_{digest}.py')
+
+        if module_path in self._unsupported:
+            raise UnsupportedNotebookError(self._unsupported[module_path])
+
+        if not os.path.exists(module_path):
+            try:
+                source = self._generate_module(notebook_path, nb)
+            except UnsupportedNotebookError as e:
+                self._unsupported[module_path] = str(e)
+                raise
+            tmp_path = module_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(source)
+            os.replace(tmp_path, module_path)
+
+        return module_path
+
+    def _generate_module(self, notebook_path: str, nb: nbformat.NotebookNode) -> str:
+        kernel_language = nb.metadata.get('kernelspec', {}).get('language', 'python')
+        if kernel_language != 'python':
+            raise UnsupportedNotebookError(f'Unsupported kernel language: {kernel_language}')
+
+        parameters_index = self._find_parameters_cell(nb)
+        defaults = {}
+        cells = []
+
+        for cell_idx, cell in enumerate(nb.cells):
+            if cell.cell_type != 'code' or not cell.source.strip():
+                continue
+            self._check_supported(cell_idx, cell.source)
+
+            if cell_idx == parameters_index:
+                defaults = self._parse_parameters(cell_idx, cell.source)
+                continue
+
+            body, expression = self._split_trailing_expression(cell_idx, cell.source)
+            cells.append({'cell_index': cell_idx, 'body': body, 'expression': expression})
+
+        # Keep the exporter's rendering alongside the compiled module for inspection
+        notebook_source, _ = self.exporter.from_notebook_node(nb)
+
+        return MODULE_TEMPLATE.format(
+            notebook_path=notebook_path,
+            notebook_source=notebook_source,
+            cells=cells,
+            defaults=defaults,
+            signature=''.join(f'{name}=PARAMETER_DEFAULTS[{name!r}], ' for name in defaults),
+            assignments=', '.join(f'{name!r}: {name}' for name in defaults)
+        )
+
+    def _find_parameters_cell(self, nb: nbformat.NotebookNode) -> Optional[int]:
+        """Locate the parameters cell: tagged 'parameters', or a code cell headed '# Parameters'"""
+        for cell_idx, cell in enumerate(nb.cells):
+            if cell.cell_type == 'code' and 'parameters' in cell.metadata.get('tags', []):
+                return cell_idx
+        for cell_idx, cell in enumerate(nb.cells):
+            if cell.cell_type == 'code' and cell.source.lstrip().lower().startswith('# parameters'):
+                return cell_idx
+        return None
+
+    def _check_supported(self, cell_idx: int, source: str):
+        for pattern in UNSUPPORTED_PATTERNS:
+            if pattern.search(source):
+                raise UnsupportedNotebookError(f'Cell {cell_idx} uses kernel-only syntax')
+        try:
+            ast.parse(source)
+        except SyntaxError as e:
+            raise UnsupportedNotebookError(f'Cell {cell_idx} is not plain Python: {e}')
+
+    def _parse_parameters(self, cell_idx: int, source: str) -> Dict[str, Any]:
+        """Parameters must be simple `name = <literal>` assignments"""
+        defaults = {}
+        for node in ast.parse(source).body:
+            if not (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name)):
+                raise UnsupportedNotebookError(f'Parameters cell {cell_idx} contains non-assignment code')
+            try:
+                defaults[node.targets[0].id] = ast.literal_eval(node.value)
+            except ValueError:
+                raise UnsupportedNotebookError(f'Parameters cell {cell_idx} has a non-literal default')
+        return defaults
+
+    def _split_trailing_expression(self, cell_idx: int, source: str):
+        """Separate a trailing expression so its value can be reported like a kernel would"""
+        tree = ast.parse(source)
+        if not tree.body or not isinstance(tree.body[-1], ast.Expr):
+            return source, None
+
+        last = tree.body[-1]
+        if last.col_offset != 0:
+            # Expression shares a line with other statements; don't try to split it
+            return source, None
+
+        lines = source.splitlines(keepends=True)
+        body = ''.join(lines[:last.lineno - 1])
+        expression = ast.get_source_segment(source, last.value)
+        if expression is None:
+            return source, None
+        return body, expression
+
+    def _get_module(self, module_path: str):
+        if module_path not in self._modules:
+            self._modules[module_path] = _load_module(module_path)
+        return self._modules[module_path]
+
+    def _run_in_thread(self, module_path: str, parameters: Dict[str, Any]) -> Future:
+        """Run a compiled module on its own daemon thread so the caller can give up on it.
+
+        Python threads can't be killed: a notebook that hangs past the timeout
+        keeps running in the background until it returns.
+        """
+        future = Future()
+
+        def target():
+            try:
+                future.set_result(self._get_module(module_path).run(**parameters))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=target, daemon=True).start()
+        return future
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Forking this multithreaded server could copy locks held by other threads into the worker
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def _apply_outputs(self, nb: nbformat.NotebookNode, cell_outputs: List[Dict[str, Any]]) -> nbformat.NotebookNode:
+        """Write captured outputs back into the notebook, as ExecutePreprocessor would"""
+        for execution_count, cell_output in enumerate(cell_outputs, start=1):
+            cell = nb.cells[cell_output['cell_index']]
+            cell.execution_count = execution_count
+            cell.outputs = [nbformat.v4.new_output(**output) for output in cell_output['outputs']]
+        return nb
@@ -0,0 +1,224 @@
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = ('collapsed', 'speedscope')
+
+class _Profile:
+    def __init__(self, thread_id: int, label: str):
+        self.profile_id = uuid.uuid4().hex[:12]
+        self.thread_id = thread_id
+        self.label = label
+        self.started = time.time()
+        self.samples = Counter()
+
+class RequestProfiler:
+    """Opt-in sampling profiler for Flask requests.
+
+    A single background thread wakes every ``interval`` seconds while at least
+    one profiled request is in flight and records the Python stack of each
+    profiled request thread. Requests are profiled when they carry an
+    ``X-Profile: 1`` header, or at random with probability ``sample_rate``.
+    Unprofiled requests only pay for one random() call, so overhead is bounded
+    by the sampling rate and interval. Each profile is written to
+    ``output_dir`` as collapsed stacks (flamegraph.pl, speedscope) or a
+    speedscope JSON file. The admin endpoints and the ``X-Profile`` header
+    require ``admin_token``; without one they are disabled.
+    """
+
+    def __init__(self, output_dir: str = 'profiles', sample_rate: float = 0.0, interval: float = 0.005,
+                 output_format: str = 'speedscope', admin_token: str = None, max_profiles: int = 500):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.output_format = output_format
+        self.admin_token = admin_token
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._active = {}
+        self._sampler = None
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def configure(self, sample_rate: float = None, interval: float = None, output_format: str = None):
+        if sample_rate is not None:
+            sample_rate = float(sample_rate)
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError('sample_rate must be between 0 and 1')
+            self.sample_rate = sample_rate
+        if interval is not None:
+            interval = float(interval)
+            if interval < 0.001:
+                raise ValueError('interval must be at least 1ms')
+            self.interval = interval
+        if output_format is not None:
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}")
+            self.output_format = output_format
+
+    def get_settings(self) -> Dict[str, Any]:
+        return {
+            'sample_rate': self.sample_rate,
+            'interval_ms': self.interval * 1000,
+            'format': self.output_format,
+            'output_dir': self.output_dir,
+            'active_profiles': len(self._active)
+        }
+
+    @property
+    def admin_enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    def is_authorized(self, token: Optional[str]) -> bool:
+        """Fails closed: with no admin token configured, nobody is authorized"""
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(token.encode('utf-8'), self.admin_token.encode('utf-8'))
+
+    def list_profiles(self) -> List[str]:
+        if not os.path.exists(self.output_dir):
+            return []
+        return sorted(os.listdir(self.output_dir), reverse=True)
+
+    def _before_request(self):
+        requested = request.headers.get('X-Profile') == '1' and \
+            self.is_authorized(request.headers.get('X-Profile-Token'))
+        if not requested and (self.sample_rate <= 0 or random.random() >= self.sample_rate):
+            return
+
+        profile = _Profile(threading.get_ident(), f'{request.method} {request.path}')
+        g.request_profile = profile
+        with self._lock:
+            self._active[profile.thread_id] = profile
+            self._ensure_sampler()
+        self._wakeup.set()
+
+    def _after_request(self, response):
+        # Finish the profile here so the header can name the file that was written
+        filename = self._finish(g.pop('request_profile', None))
+        if filename is not None:
+            response.headers['X-Profile-Id'] = filename
+        return response
+
+    def _teardown_request(self, exc):
+        # Requests that failed before after_request still get their profile written
+        self._finish(g.pop('request_profile', None))
+
+    def _finish(self, profile: Optional[_Profile]) -> Optional[str]:
+        if profile is None:
+            return None
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+        try:
+            return self._write(profile)
+        except OSError:
+            logger.exception('Failed to write request profile')
+            return None
+
+    def _ensure_sampler(self):
+        # Caller holds self._lock
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self):
+        while True:
+            self._wakeup.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+                    continue
+                profiles = list(self._active.values())
+
+            frames = sys._current_frames()
+            for profile in profiles:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    profile.samples[self._collapse(frame)] += 1
+
+    def _collapse(self, frame) -> str:
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _write(self, profile: _Profile) -> Optional[str]:
+        """Write the profile and return its filename, or None if nothing was sampled"""
+        if not profile.samples:
+            return None
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', profile.label).strip('_')
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(profile.started))
+        base = os.path.join(self.output_dir, f'{stamp}_{slug}_{profile.profile_id}')
+
+        if self.output_format == 'collapsed':
+            path = base + '.collapsed'
+            with open(path, 'w') as f:
+                for stack, count in profile.samples.most_common():
+                    f.write(f'{stack} {count}\n')
+        else:
+            path = base + '.speedscope.json'
+            with open(path, 'w') as f:
+                json.dump(self._to_speedscope(profile), f)
+
+        self._prune()
+        return os.path.basename(path)
+
+    def _to_speedscope(self, profile: _Profile) -> Dict[str, Any]:
+        frame_index = {}
+        samples, weights = [], []
+        for stack, count in profile.samples.items():
+            indices = []
+            for name in stack.split(';'):
+                if name not in frame_index:
+                    frame_index[name] = len(frame_index)
+                indices.append(frame_index[name])
+            samples.append(indices)
+            weights.append(count * self.interval * 1000)
+
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': [{'name': name} for name in frame_index]},
+            'profiles': [{
+                'type': 'sampled',
+                'name': profile.label,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': sum(weights),
+                'samples': samples,
+                'weights': weights
+            }],
+            'name': profile.label,
+            'exporter': 'request_profiler'
+        }
+
+    def _prune(self):
+        """Keep at most max_profiles files, dropping the oldest"""
+        files = sorted(
+            (os.path.join(self.output_dir, name) for name in os.listdir(self.output_dir)),
+            key=os.path.getmtime
+        )
+        for path in files[:-self.max_profiles]:
+            os.remove(path)
@@ -0,0 +1,189 @@
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+# Classes in priority order: any queued interactive request is dispatched
+# before queued batch work, whenever a slot frees up
+PRIORITY_CLASSES = ['interactive', 'batch']
+
+class SchedulerTimeout(Exception):
+    """Raised when a request waits longer than its queue timeout"""
+    pass
+
+class _Ticket:
+    def __init__(self, priority_class: str, tenant: str):
+        self.priority_class = priority_class
+        self.tenant = tenant
+        self.enqueued_at = time.monotonic()
+        self.granted = threading.Event()
+
+class RequestScheduler:
+    """Admission control for work that shares the Gemini quota and server threads.
+
+    At most ``max_concurrent`` requests hold a slot at once. Waiting requests
+    are dispatched strictly by priority class, so interactive interview turns
+    jump ahead of queued bulk grading. Within a class, tenants (courses) share
+    slots by weighted fair queuing: each grant advances the tenant's virtual
+    time by 1 / weight and the tenant with the lowest virtual time goes next.
+    ``interactive_reserved`` slots are held back from batch work, so long
+    batch jobs can never occupy every slot and stall interview turns.
+    """
+
+    def __init__(self, max_concurrent: int = 8, tenant_weights: Dict[str, float] = None,
+                 queue_timeout: float = 300, metrics_window: int = 1000, interactive_reserved: int = 2):
+        if not 0 <= interactive_reserved < max_concurrent:
+            raise ValueError('interactive_reserved must be at least 0 and less than max_concurrent')
+        for tenant, weight in (tenant_weights or {}).items():
+            if weight <= 0:
+                raise ValueError(f"Weight for tenant '{tenant}' must be positive")
+        self.max_concurrent = max_concurrent
+        self.interactive_reserved = interactive_reserved
+        self.tenant_weights = tenant_weights or {}
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_by_class = {priority_class: 0 for priority_class in PRIORITY_CLASSES}
+        self._queues = {priority_class: {} for priority_class in PRIORITY_CLASSES}
+        self._virtual_time = {priority_class: {} for priority_class in PRIORITY_CLASSES}
+        self._metrics = {
+            priority_class: {
+                'dispatched': 0,
+                'timed_out': 0,
+                'total_wait': 0.0,
+                'max_wait': 0.0,
+                'recent_waits': deque(maxlen=metrics_window)
+            }
+            for priority_class in PRIORITY_CLASSES
+        }
+
+    @contextlib.contextmanager
+    def slot(self, priority_class: str = 'batch', tenant: str = None, timeout: float = None):
+        """Hold a scheduler slot for the duration of the block"""
+        self.acquire(priority_class, tenant, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority_class)
+
+    def acquire(self, priority_class: str = 'batch', tenant: str = None, timeout: float = None):
+        if priority_class not in self._queues:
+            raise ValueError(f"Unknown priority class '{priority_class}', expected one of {PRIORITY_CLASSES}")
+
+        ticket = _Ticket(priority_class, tenant or 'default')
+        with self._lock:
+            queues = self._queues[priority_class]
+            if ticket.tenant not in queues:
+                queues[ticket.tenant] = deque()
+                self._activate_tenant(priority_class, ticket.tenant)
+            queues[ticket.tenant].append(ticket)
+            self._dispatch()
+
+        if ticket.granted.wait(self.queue_timeout if timeout is None else timeout):
+            return
+
+        with self._lock:
+            # The grant may have raced with the timeout
+            if ticket.granted.is_set():
+                return
+            queue = self._queues[priority_class][ticket.tenant]
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[priority_class][ticket.tenant]
+            self._metrics[priority_class]['timed_out'] += 1
+        raise SchedulerTimeout(f'Timed out waiting for a {priority_class} slot')
+
+    def release(self, priority_class: str = 'batch'):
+        with self._lock:
+            self._active -= 1
+            self._active_by_class[priority_class] -= 1
+            self._dispatch()
+
+    def _activate_tenant(self, priority_class: str, tenant: str):
+        """A tenant joining the queue starts at the current minimum virtual time,
+        so idle periods don't accumulate credit it could later burst with"""
+        virtual_time = self._virtual_time[priority_class]
+        waiting = [virtual_time.get(t, 0.0) for t in self._queues[priority_class] if t != tenant]
+        floor = min(waiting) if waiting else max(virtual_time.values(), default=0.0)
+        virtual_time[tenant] = max(virtual_time.get(tenant, 0.0), floor)
+
+    def _dispatch(self):
+        # Caller holds self._lock
+        while self._active < self.max_concurrent:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            self._active += 1
+            self._active_by_class[ticket.priority_class] += 1
+            self._record_wait(ticket)
+            ticket.granted.set()
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        for priority_class in PRIORITY_CLASSES:
+            queues = self._queues[priority_class]
+            if not queues or not self._has_capacity(priority_class):
+                continue
+            virtual_time = self._virtual_time[priority_class]
+            tenant = min(queues, key=lambda t: virtual_time[t])
+            ticket = queues[tenant].popleft()
+            if not queues[tenant]:
+                del queues[tenant]
+            virtual_time[tenant] += 1.0 / self.tenant_weights.get(tenant, 1.0)
+            return ticket
+        return None
+
+    def _has_capacity(self, priority_class: str) -> bool:
+        # Caller holds self._lock
+        if priority_class == 'interactive':
+            return True
+        return self._active_by_class[priority_class] < self.max_concurrent - self.interactive_reserved
+
+    def _record_wait(self, ticket: _Ticket):
+        wait = time.monotonic() - ticket.enqueued_at
+        metrics = self._metrics[ticket.priority_class]
+        metrics['dispatched'] += 1
+        metrics['total_wait'] += wait
+        metrics['max_wait'] = max(metrics['max_wait'], wait)
+        metrics['recent_waits'].append(wait)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue-wait metrics per priority class (seconds)"""
+        with self._lock:
+            classes = {}
+            for priority_class, metrics in self._metrics.items():
+                recent = sorted(metrics['recent_waits'])
+                classes[priority_class] = {
+                    'queued': sum(len(q) for q in self._queues[priority_class].values()),
+                    'dispatched': metrics['dispatched'],
+                    'timed_out': metrics['timed_out'],
+                    'mean_wait': metrics['total_wait'] / metrics['dispatched'] if metrics['dispatched'] else 0.0,
+                    'max_wait': metrics['max_wait'],
+                    'p50_wait': self._percentile(recent, 0.50),
+                    'p95_wait': self._percentile(recent, 0.95),
+                    'p99_wait': self._percentile(recent, 0.99)
+                }
+            return {
+                'max_concurrent': self.max_concurrent,
+                'interactive_reserved': self.interactive_reserved,
+                'active': self._active,
+                'active_by_class': dict(self._active_by_class),
+                'classes': classes
+            }
+
+    @staticmethod
+    def _percentile(sorted_values: List[float], fraction: float) -> float:
+        if not sorted_values:
+            return 0.0
+        return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def parse_tenant_weights(spec: str) -> Dict[str, float]:
+    """Parse 'course_a:2,course_b:1' into a weight map"""
+    weights = {}
+    for entry in (spec or '').split(','):
+        if ':' in entry:
+            tenant, weight = entry.split(':', 1)
+            weights[tenant.strip()] = float(weight)
+            if weights[tenant.strip()] <= 0:
+                raise ValueError(f"Weight for tenant '{tenant.strip()}' must be positive")
+    return weights
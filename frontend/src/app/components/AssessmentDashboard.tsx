@@ -28,7 +28,9 @@ export default function AssessmentDashboard() {
   const [workflowType, setWorkflowType] = useState<'standard' | 'colab'>('standard');
   const [problemStatement, setProblemStatement] = useState('');
   const [studentResponse, setStudentResponse] = useState('');
+  const [studentId, setStudentId] = useState('');
   const [evaluationResult, setEvaluationResult] = useState<EvaluationResult | null>(null);
+  const [reportUrl, setReportUrl] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
 
   const sampleProblemStatement = `Design a GenAI-powered chatbot for customer service. Consider the following:
@@ -117,6 +119,10 @@ I would also implement a feedback loop where poor responses are flagged for prom
         rubric_name: selectedRubric,
       };
 
+      if (studentId.trim()) {
+        requestBody.student_id = studentId.trim();
+      }
+
       if (workflowType === 'colab') {
         endpoint = 'http://localhost:5000/api/execute-colab';
         requestBody.workflow_name = selectedColabWorkflow;
@@ -135,6 +141,7 @@ I would also implement a feedback loop where poor responses are flagged for prom
       const result = await response.json();
       if (response.ok) {
         setEvaluationResult(result.evaluation);
+        setReportUrl(result.report_url ? `http://localhost:5000${result.report_url}` : null);
       } else {
         alert(`Error: ${result.error}`);
       }
@@ -280,6 +287,13 @@ I would also implement a feedback loop where poor responses are flagged for prom
           <h3 className="text-lg font-medium text-gray-900 dark:text-white mb-4">
             Student Response
           </h3>
+          <input
+            type="text"
+            value={studentId}
+            onChange={(e) => setStudentId(e.target.value)}
+            className="w-full mb-3 px-3 py-2 border border-gray-300 rounded-md shadow-sm focus:ring-blue-500 focus:border-blue-500 dark:bg-gray-700 dark:border-gray-600 dark:text-white"
+            placeholder="Student ID (optional, used to store evaluation history)"
+          />
           <textarea
             value={studentResponse}
             onChange={(e) => setStudentResponse(e.target.value)}
@@ -315,6 +329,17 @@ I would also implement a feedback loop where poor responses are flagged for prom
                 {evaluationResult.overall_score}/10
               </span>
             </div>
+
+            {reportUrl && (
+              <a
+                href={reportUrl}
+                target="_blank"
+                rel="noopener noreferrer"
+                className="inline-block text-sm text-blue-600 dark:text-blue-400 hover:underline"
+              >
+                View executed notebook report
+              </a>
+            )}
             
             {evaluationResult.concept_scores && Object.keys(evaluationResult.concept_scores).length > 0 && (
               <div>